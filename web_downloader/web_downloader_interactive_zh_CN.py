@@ -1,15 +1,136 @@
 #!/usr/bin/env python
 # -*- coding:utf-8 -*-
 
+import asyncio
+import json
+import logging
 import os
 import platform
-from concurrent.futures import ThreadPoolExecutor
+import posixpath
+import queue
+import socket
+import threading
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextlib import contextmanager, suppress
+from functools import lru_cache, partial
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 from time import sleep, time
-from urllib.parse import urljoin
+from typing import BinaryIO, Iterable, Iterator, Mapping
+from urllib.parse import urljoin, urlparse, urlsplit
 
+import lxml.etree
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import HTTPError as Urllib3HTTPError
+from urllib3.util.connection import allowed_gai_family
+from urllib3.util.retry import Retry
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+logger = logging.getLogger(__name__)
+logger.setLevel(logging.INFO)
+
+_system_getaddrinfo = socket.getaddrinfo
+_active_runs = 0
+_active_runs_lock = threading.Lock()
+_log_handler = None
+_log_listener = None
+
+
+@lru_cache(maxsize=256)
+def _cached_getaddrinfo(*args, **kwargs) -> list:
+    """
+    Resolve an address with ``socket.getaddrinfo``
+    and cache the result for the rest of the run.
+    """
+    return _system_getaddrinfo(*args, **kwargs)
+
+
+@contextmanager
+def _active_run() -> Iterator[None]:
+    """
+    Install the cached DNS resolver and the queued log handler
+    while at least one download is running, and remove them
+    (flushing the pending logs) when the last one finishes.
+    """
+    global _active_runs, _log_handler, _log_listener
+
+    with _active_runs_lock:
+        if _active_runs == 0:
+            socket.getaddrinfo = _cached_getaddrinfo
+            log_queue = queue.SimpleQueue()
+            _log_handler = QueueHandler(log_queue)
+            _log_listener = QueueListener(log_queue, logging.StreamHandler())
+            logger.addHandler(_log_handler)
+            _log_listener.start()
+        _active_runs += 1
+    try:
+        yield
+    finally:
+        with _active_runs_lock:
+            _active_runs -= 1
+            if _active_runs == 0:
+                socket.getaddrinfo = _system_getaddrinfo
+                _cached_getaddrinfo.cache_clear()
+                logger.removeHandler(_log_handler)
+                _log_listener.stop()
+
+
+class _ConcurrencyLimit(object):
+    """
+    A semaphore whose number of permits can be lowered
+    even while all of them are held: a permit that cannot be
+    taken back right away is retired by its next release.
+    """
+
+    def __init__(self, permits: int) -> None:
+        """
+        Args
+        ----
+        permits: int
+            The initial number of permits.
+        """
+        self._semaphore = threading.Semaphore(permits)
+        self._retire_lock = threading.Lock()
+        self._to_retire = 0
+
+    def acquire(self, blocking: bool = True) -> bool:
+        """
+        Take a permit, waiting for one unless blocking is False.
+        """
+        return self._semaphore.acquire(blocking)
+
+    def release(self) -> None:
+        """
+        Give a permit back, or retire it if a removal is pending.
+        """
+        with self._retire_lock:
+            if self._to_retire:
+                self._to_retire -= 1
+                return
+        self._semaphore.release()
+
+    def add_permit(self) -> None:
+        """
+        Add a permit, cancelling a pending removal if there is one.
+        """
+        self.release()
+
+    def remove_permit(self) -> None:
+        """
+        Remove a permit now if one is free,
+        otherwise retire the next one released.
+        """
+        if self._semaphore.acquire(blocking=False):
+            return
+        with self._retire_lock:
+            self._to_retire += 1
 
 
 class WebDownloader(object):
@@ -31,8 +152,13 @@ class WebDownloader(object):
     requests_per_minute: integer
         The number of requests to the specified URL per minute.
         Default is 10.
-    last_request_time: float
-        The time of the last request made to the website.
+    max_workers: integer
+        The number of threads used to download elements.
+        Default is three times the number of CPUs, at least 8.
+    session: requests.Session
+        The session shared by all requests so that
+        keep-alive connections are reused between downloads.
+        It carries the default headers.
     """
 
     headers = {
@@ -42,19 +168,90 @@ class WebDownloader(object):
         "Chrome/123.0.0.0 Safari/537.36 Edg/123.0.0.0"
     }
 
+    max_connections_per_host = 6
+    initial_concurrency = 4
+    ranged_download_threshold = 8 * 1024 * 1024
+    range_parts = 4
+    concurrency_sample_interval = 2.0
+    manifest_name = ".web_downloader.json"
+
     def __init__(self,
                  website_url: str,
                  folder_path: str,
                  element_tag: str = "image",
-                 requests_per_minute: int = 10) -> None:
+                 requests_per_minute: int = 10,
+                 max_workers: int = max(8, 3 * (os.cpu_count() or 1))) -> None:
         """
         Initialize the WebDownloader object.
         """
         self.website_url = website_url
+        self._website_scheme = urlsplit(website_url).scheme
         self.folder_path = folder_path
+        self._folder = os.fspath(self._check_folder_path())
+        self._initial_names = frozenset(
+            entry.name for entry in os.scandir(self._folder)
+        )
+        self._taken_names = set(self._initial_names)
+        self._name_counters = defaultdict(int)
+        self._name_lock = threading.Lock()
+        self._manifest = self._load_manifest()
+        self._manifest_lock = threading.Lock()
         self.element_tag = element_tag
+        self._html_tag = {"image": "img"}.get(element_tag, element_tag)
         self.requests_per_minute = requests_per_minute
-        self.last_request_time = 0.0
+        self.max_workers = max_workers
+        self._bucket_lock = threading.Lock()
+        self._tokens = float(requests_per_minute)
+        self._last_refill = time()
+        self._host_semaphores = defaultdict(
+            lambda: threading.BoundedSemaphore(self.max_connections_per_host)
+        )
+        self._host_semaphores_lock = threading.Lock()
+        self._downloaded_bytes = 0
+        self._bytes_lock = threading.Lock()
+        self.session = self._create_session()
+        self.session.headers.update(self.headers)
+        self._range_executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def __enter__(self) -> "WebDownloader":
+        """
+        Enter the runtime context of the WebDownloader object.
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """
+        Exit the runtime context and close the session.
+        """
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the underlying session and its pooled connections,
+        and stop the threads that download byte ranges.
+        """
+        self.session.close()
+        self._range_executor.shutdown()
+
+    @staticmethod
+    def _create_session() -> requests.Session:
+        """
+        Create a session with a connection pool and a retry policy
+        mounted for both HTTP and HTTPS.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=64,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.3,
+                status_forcelist=[429, 500, 502, 503, 504]
+            )
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
 
     def _check_folder_path(self) -> Path:
         """
@@ -67,27 +264,261 @@ class WebDownloader(object):
             )
         return Path(self.folder_path)
 
-    def _rename_duplicate_files(self, file_name: str) -> str:
+    def _reserve_file_name(self, file_name: str) -> str:
         """
-        Rename files if their names are the same.
+        Reserve a file name in the folder,
+        renaming it if the name is already taken.
 
         Args
         ----
         file_name: str
             The original file name.
         """
-        folder_path = self._check_folder_path()
-        base_name = Path(file_name).stem
-        extension = Path(file_name).suffix
+        base_name, extension = os.path.splitext(file_name)
 
-        i = 1
-        while (folder_path / file_name).exists():
-            file_name = f"{base_name}_({i}){extension}"
-            i += 1
-        return file_name
+        with self._name_lock:
+            updated_file_name = file_name
+            while updated_file_name in self._taken_names:
+                self._taken_names.add(updated_file_name)
+                self._name_counters[file_name] += 1
+                i = self._name_counters[file_name]
+                updated_file_name = f"{base_name}_({i}){extension}"
+            self._taken_names.add(updated_file_name)
+        return updated_file_name
+
+    def _load_manifest(self) -> dict:
+        """
+        Load the record of the elements previous runs fully downloaded
+        into the folder, with the validators the server sent for them.
+        """
+        try:
+            with open(os.path.join(self._folder, self.manifest_name)) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        return manifest if isinstance(manifest, dict) else {}
+
+    def _save_manifest(self) -> None:
+        """
+        Write the record of the downloaded elements back to the folder.
+        """
+        manifest_path = os.path.join(self._folder, self.manifest_name)
+        temp_path = f"{manifest_path}.{uuid.uuid4().hex}.part"
+        with self._manifest_lock:
+            with open(temp_path, "w") as f:
+                json.dump(self._manifest, f, indent=4)
+            os.replace(temp_path, manifest_path)
+
+    def _previous_file(self, url: str) -> str:
+        """
+        Get the name of the file a previous run fully downloaded
+        from the URL, or None if there is no such file.
+
+        Args
+        ----
+        url: string
+            The URL of the element.
+        """
+        with self._manifest_lock:
+            entry = self._manifest.get(url)
+        if not isinstance(entry, dict):
+            return None
+        if entry.get("file") not in self._initial_names:
+            return None
+        return entry["file"]
+
+    @contextmanager
+    def _open_element_file(self,
+                           url: str,
+                           headers: Mapping) -> Iterator[BinaryIO]:
+        """
+        Open a temporary file in the folder for the body of an element.
+        Once the body is complete, move it over the file a previous run
+        downloaded from the same URL, or else to a free name, and record
+        the validators of the response; if writing fails, delete it so
+        that no partial file is left behind.
+
+        Args
+        ----
+        url: string
+            The URL of the element.
+        headers: Mapping
+            The headers of the response.
+        """
+        temp_path = os.path.join(self._folder, f".{uuid.uuid4().hex}.part")
+        file_object = open(temp_path, "xb")
+        try:
+            with file_object:
+                yield file_object
+        except BaseException:
+            os.remove(temp_path)
+            raise
+
+        try:
+            updated_file_name = self._previous_file(url)
+            if updated_file_name is not None:
+                os.replace(
+                    temp_path,
+                    os.path.join(self._folder, updated_file_name)
+                )
+            else:
+                updated_file_name = self._move_to_free_name(
+                    temp_path,
+                    self._element_file_name(url)
+                )
+        except BaseException:
+            with suppress(FileNotFoundError):
+                os.remove(temp_path)
+            raise
+        with self._manifest_lock:
+            self._manifest[url] = {
+                "file": updated_file_name,
+                "etag": headers.get("ETag"),
+                "last_modified": headers.get("Last-Modified")
+            }
+        logger.info("Downloaded: %s", updated_file_name)
+
+    def _move_to_free_name(self, temp_path: str, file_name: str) -> str:
+        """
+        Move a file to a free name in the folder without replacing
+        a file that appeared there after the folder was listed
+        (unless hard links are not supported), and return the name
+        it was given.
+
+        Args
+        ----
+        temp_path: string
+            The path of the file to be moved.
+        file_name: string
+            The original file name.
+        """
+        while True:
+            updated_file_name = self._reserve_file_name(file_name)
+            updated_path = os.path.join(self._folder, updated_file_name)
+            try:
+                os.link(temp_path, updated_path)
+            except FileExistsError:
+                continue
+            except OSError:
+                os.replace(temp_path, updated_path)
+                return updated_file_name
+            os.remove(temp_path)
+            return updated_file_name
 
     @staticmethod
-    def _make_request(url: str) -> requests.Response:
+    def _preallocate(file_object: BinaryIO, headers: Mapping) -> bool:
+        """
+        Reserve disk space for the body announced by Content-Length,
+        so that large files are laid out in contiguous extents.
+        Return whether space was reserved; the file should then be
+        truncated to the bytes actually written.
+
+        Args
+        ----
+        file_object: BinaryIO
+            The file the body is written to.
+        headers: Mapping
+            The headers of the response.
+        """
+        if not hasattr(os, "posix_fallocate"):
+            return False
+        try:
+            content_length = int(headers.get("Content-Length", 0))
+        except ValueError:
+            return False
+        if content_length <= 0:
+            return False
+        try:
+            os.posix_fallocate(file_object.fileno(), 0, content_length)
+        except OSError:
+            return False
+        return True
+
+    def _host_semaphore(self, url: str) -> threading.BoundedSemaphore:
+        """
+        Get the semaphore limiting concurrent requests to the host of a URL.
+
+        Args
+        ----
+        url: string
+            The URL whose host is looked up.
+        """
+        with self._host_semaphores_lock:
+            return self._host_semaphores[urlparse(url).netloc]
+
+    @staticmethod
+    def _resolve_host(url: str) -> None:
+        """
+        Resolve the host of a URL into the DNS cache.
+
+        Args
+        ----
+        url: string
+            The URL whose host is resolved.
+        """
+        parsed_url = urlparse(url)
+        if parsed_url.hostname is None:
+            return
+        default_port = 443 if parsed_url.scheme == "https" else 80
+        try:
+            socket.getaddrinfo(
+                parsed_url.hostname,
+                parsed_url.port or default_port,
+                allowed_gai_family(),
+                socket.SOCK_STREAM
+            )
+        except (OSError, ValueError):
+            pass
+
+    def _warm_up_host(self, url: str) -> None:
+        """
+        Resolve the host of a URL and open a keep-alive connection to it
+        with a HEAD request, so that downloads start on a warm pool.
+
+        Args
+        ----
+        url: string
+            A URL on the host to be warmed up.
+        """
+        self._resolve_host(url)
+        self._acquire_token()
+        try:
+            self.session.head(
+                url=url,
+                timeout=10
+            ).close()
+        except requests.RequestException:
+            pass
+
+    def _acquire_token(self) -> None:
+        """
+        Take a token from the request bucket,
+        sleeping until one is available if the bucket is empty.
+        """
+        wait_time = self._reserve_token()
+        if wait_time > 0:
+            sleep(wait_time)
+
+    def _reserve_token(self) -> float:
+        """
+        Take a token from the request bucket and return the number
+        of seconds to wait before it is available, so that the threaded
+        and the asynchronous downloads share one rate limit.
+        """
+        with self._bucket_lock:
+            now = time()
+            self._tokens = min(
+                self.requests_per_minute,
+                self._tokens
+                + (now - self._last_refill) * self.requests_per_minute / 60
+            )
+            self._last_refill = now
+            self._tokens -= 1
+            return -self._tokens * 60 / self.requests_per_minute
+
+    def _make_request(self,
+                      url: str,
+                      headers: dict = None) -> requests.Response:
         """
         Make a request to the specified URL.
 
@@ -95,13 +526,179 @@ class WebDownloader(object):
         ----
         url: string
             The URL to make the request to.
+        headers: dict
+            Extra headers sent along with the session ones.
         """
-        return requests.get(
+        return self.session.get(
             url=url,
-            headers=WebDownloader.headers,
-            timeout=10
+            headers=headers,
+            timeout=10,
+            stream=True
         )
 
+    @staticmethod
+    def _element_file_name(url: str) -> str:
+        """
+        Get the file name of an element from the last non-empty segment
+        of its URL path, or from the host name if the path has none.
+
+        Args
+        ----
+        url: string
+            The URL of the element.
+        """
+        split_url = urlsplit(url)
+        return (
+            posixpath.basename(split_url.path.rstrip("/"))
+            or split_url.hostname
+            or "index"
+        )
+
+    def _conditional_headers(self, url: str) -> dict:
+        """
+        Build If-None-Match and If-Modified-Since headers from the
+        validators recorded when a previous run fully downloaded the URL.
+
+        Args
+        ----
+        url: string
+            The URL of the element to be downloaded.
+        """
+        if self._previous_file(url) is None:
+            return {}
+        with self._manifest_lock:
+            entry = self._manifest[url]
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _resolve_url(self, src: str) -> str:
+        """
+        Resolve the src of an element against the website URL,
+        leaving absolute URLs untouched without parsing them.
+
+        Args
+        ----
+        src: string
+            The src attribute of the element.
+        """
+        if src.startswith(("http://", "https://")):
+            return src
+        if src.startswith("//"):
+            return f"{self._website_scheme}:{src}"
+        return urljoin(self.website_url, src)
+
+    def _iter_element_srcs(self,
+                           html_chunks: Iterable[bytes]) -> Iterator[str]:
+        """
+        Parse an HTML page incrementally and yield the src of each element
+        as soon as its start tag has been read.
+
+        Args
+        ----
+        html_chunks: iterable
+            The raw HTML source of the website, in chunks.
+        """
+        parser = lxml.etree.HTMLPullParser(
+            events=("start",),
+            tag=self._html_tag
+        )
+
+        for html_chunk in html_chunks:
+            parser.feed(html_chunk)
+            for _, element in parser.read_events():
+                elem_src = element.get("src")
+                if elem_src is not None:
+                    yield elem_src
+        try:
+            parser.close()
+        except lxml.etree.XMLSyntaxError:
+            return
+        for _, element in parser.read_events():
+            elem_src = element.get("src")
+            if elem_src is not None:
+                yield elem_src
+
+    def _iter_element_urls(self,
+                           html_chunks: Iterable[bytes]) -> Iterator[str]:
+        """
+        Parse an HTML page incrementally and yield the absolute URL
+        of each element as soon as its start tag has been read,
+        skipping the srcs that are not valid URLs and those that are
+        not fetched over HTTP, such as data: placeholders.
+
+        Args
+        ----
+        html_chunks: iterable
+            The raw HTML source of the website, in chunks.
+        """
+        for elem_src in self._iter_element_srcs(html_chunks):
+            try:
+                elem_url = self._resolve_url(elem_src)
+                scheme = urlsplit(elem_url).scheme
+            except ValueError as error:
+                logger.warning("Skipped: %s (%s)", elem_src, error)
+                continue
+            if scheme in ("http", "https"):
+                yield elem_url
+
+    def _extract_element_urls(self, html_content: bytes) -> list:
+        """
+        Extract the absolute URLs of the elements from an HTML page.
+
+        Args
+        ----
+        html_content: bytes
+            The raw HTML source of the website.
+        """
+        return list(dict.fromkeys(self._iter_element_urls([html_content])))
+
+    def _produce_element_urls(self,
+                              response: requests.Response,
+                              url_queue: queue.Queue,
+                              errors: list) -> None:
+        """
+        Put the URLs of the elements into the queue while the page
+        is still being received, resolving each new host
+        in the background so that parsing never waits for DNS.
+        The first download from a host then opens its connection.
+        A None is put at the end to mark that no URL follows,
+        also when reading the page fails; the error is then added
+        to the list for the calling thread to raise.
+
+        Args
+        ----
+        response: requests.Response
+            The streamed response of the website.
+        url_queue: queue.Queue
+            The queue of URLs waiting to be downloaded.
+        errors: list
+            The list the error that stopped the parsing is added to.
+        """
+        seen_urls = set()
+        seen_hosts = set()
+        resolver = ThreadPoolExecutor(max_workers=4)
+        try:
+            for elem_url in self._iter_element_urls(
+                response.iter_content(chunk_size=65536)
+            ):
+                if elem_url in seen_urls:
+                    continue
+                seen_urls.add(elem_url)
+                host = urlparse(elem_url).netloc
+                if host not in seen_hosts:
+                    seen_hosts.add(host)
+                    resolver.submit(self._resolve_host, elem_url)
+                url_queue.put(elem_url)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            url_queue.put(None)
+            resolver.shutdown(wait=False)
+
     def download_single_element(self, url: str) -> None:
         """
         Download a single element from the specified URL.
@@ -111,23 +708,263 @@ class WebDownloader(object):
         url: string
             The URL of the element to be downloaded.
         """
-        current_time = time()
+        self.download_single_element_ranged(url, self._element_parts())
 
-        if current_time - self.last_request_time < 60 / self.requests_per_minute:
-            sleep(
-                60/self.requests_per_minute
-                - (current_time - self.last_request_time)
-            )
+    def _element_parts(self) -> int:
+        """
+        Return the number of byte ranges an element may be split into:
+        audio and video elements can be large, images are not split.
+        """
+        return 1 if self.element_tag == "image" else self.range_parts
+
+    def _download_element(self,
+                          url: str,
+                          spare_permits: _ConcurrencyLimit,
+                          parts: int) -> None:
+        """
+        Download a single element with a request token and a connection
+        to its host already taken. Unless parts is 1, the element
+        is requested from its first byte with an open-ended range,
+        so that a large one can be split into up to that many ranges
+        without a separate HEAD request.
+
+        Args
+        ----
+        url: string
+            The URL of the element to be downloaded.
+        spare_permits: _ConcurrencyLimit
+            The permits the extra ranges of the element are counted
+            against; a range gets no thread of its own without one.
+        parts: integer
+            The maximum number of ranges the element is split into.
+        """
+        file_name = self._element_file_name(url)
+        host_semaphore = self._host_semaphore(url)
+        headers = self._conditional_headers(url)
+        if parts > 1 and hasattr(os, "pwrite"):
+            headers.update({
+                "Range": "bytes=0-",
+                "Accept-Encoding": "identity"
+            })
+        with self._make_request(url, headers) as response:
+            if response.status_code == 304:
+                logger.info("Not modified: %s", file_name)
+            elif response.status_code == 200:
+                response.raw.decode_content = True
+                with self._open_element_file(
+                    url,
+                    response.headers
+                ) as file_object:
+                    preallocated = self._preallocate(
+                        file_object,
+                        response.headers
+                    )
+                    self._write_body(response, file_object)
+                    if preallocated:
+                        file_object.truncate()
+            elif response.status_code == 206 and "Range" in headers:
+                self._download_ranges(
+                    url,
+                    response,
+                    host_semaphore,
+                    spare_permits,
+                    parts
+                )
+
+    def _write_body(self,
+                    response: requests.Response,
+                    file_object: BinaryIO,
+                    length: int = -1) -> None:
+        """
+        Write the body of a streamed response to a file as it arrives.
+
+        Args
+        ----
+        response: requests.Response
+            The streamed response.
+        file_object: BinaryIO
+            The file the body is written to.
+        length: integer
+            The number of bytes to write, or -1 for the whole body.
+        """
+        while length:
+            chunk_size = 65536 if length < 0 else min(65536, length)
+            chunk = response.raw.read(chunk_size)
+            if not chunk:
+                break
+            file_object.write(chunk)
+            with self._bytes_lock:
+                self._downloaded_bytes += len(chunk)
+            if length > 0:
+                length -= len(chunk)
+
+    def _download_ranges(self,
+                         url: str,
+                         response: requests.Response,
+                         host_semaphore: threading.BoundedSemaphore,
+                         spare_permits: _ConcurrencyLimit,
+                         parts: int) -> None:
+        """
+        Download an element answered with a partial response
+        from its first byte. If it is larger than the threshold,
+        each spare permit (together with a free connection to the host)
+        lets one of its last ranges be downloaded in the background,
+        while the current response is read up to the first of them.
+
+        Args
+        ----
+        url: string
+            The URL of the element to be downloaded.
+        response: requests.Response
+            The streamed partial response starting at the first byte.
+        host_semaphore: threading.BoundedSemaphore
+            The semaphore of the host the element is downloaded from.
+        spare_permits: _ConcurrencyLimit
+            The permits the extra ranges are counted against.
+        parts: integer
+            The maximum number of ranges the element is split into.
+        """
+        content_range = response.headers.get("Content-Range", "")
+        try:
+            content_length = int(content_range.rpartition("/")[2])
+        except ValueError:
+            content_length = 0
+
+        ranges = []
+        if content_length >= self.ranged_download_threshold:
+            part_size = -(-content_length // parts)
+            ranges = [
+                (start, min(start + part_size, content_length) - 1)
+                for start in range(part_size, content_length, part_size)
+            ]
+
+        extra_ranges = []
+        futures = []
+        try:
+            for start, end in reversed(ranges):
+                if not spare_permits.acquire(blocking=False):
+                    break
+                if not host_semaphore.acquire(blocking=False):
+                    spare_permits.release()
+                    break
+                extra_ranges.insert(0, (start, end))
+
+            with self._open_element_file(
+                url,
+                response.headers
+            ) as file_object:
+                self._preallocate(file_object, response.headers)
+                try:
+                    for start, end in extra_ranges:
+                        futures.append(self._range_executor.submit(
+                            self._download_range,
+                            response.url,
+                            file_object.fileno(),
+                            start,
+                            end,
+                            host_semaphore,
+                            spare_permits
+                        ))
+                    self._write_body(
+                        response,
+                        file_object,
+                        extra_ranges[0][0] if extra_ranges else -1
+                    )
+                finally:
+                    wait(futures)
+                for future in futures:
+                    future.result()
+        finally:
+            # The permits of the ranges never submitted are given back
+            # here; the submitted ones release their own.
+            for _ in extra_ranges[len(futures):]:
+                host_semaphore.release()
+                spare_permits.release()
+
+    def _download_range(self,
+                        url: str,
+                        file_descriptor: int,
+                        start: int,
+                        end: int,
+                        host_semaphore: threading.BoundedSemaphore,
+                        spare_permits: _ConcurrencyLimit) -> None:
+        """
+        Download the bytes from start to end (inclusive) of an element,
+        write them at the same offset of the file, and then release
+        the connection and the permit taken for this range.
+
+        Args
+        ----
+        url: string
+            The URL of the element to be downloaded.
+        file_descriptor: integer
+            The descriptor of the file the element is written to.
+        start: integer
+            The offset of the first byte.
+        end: integer
+            The offset of the last byte.
+        host_semaphore: threading.BoundedSemaphore
+            The semaphore of the host, already acquired for this range.
+        spare_permits: _ConcurrencyLimit
+            The permits, one of which is already taken for this range.
+        """
+        try:
+            self._acquire_token()
+            headers = {
+                "Range": f"bytes={start}-{end}",
+                "Accept-Encoding": "identity"
+            }
+            with self._make_request(url, headers) as response:
+                if response.status_code != 206:
+                    raise requests.HTTPError(
+                        f"Range request answered with "
+                        f"{response.status_code}",
+                        response=response
+                    )
+                offset = start
+                read_chunk = partial(response.raw.read, 65536)
+                for chunk in iter(read_chunk, b""):
+                    view = memoryview(chunk)
+                    while view:
+                        written = os.pwrite(file_descriptor, view, offset)
+                        offset += written
+                        view = view[written:]
+                    with self._bytes_lock:
+                        self._downloaded_bytes += len(chunk)
+        finally:
+            host_semaphore.release()
+            spare_permits.release()
 
-        response = WebDownloader._make_request(url)
+    def download_single_element_ranged(self,
+                                       url: str,
+                                       parts: int = 4) -> None:
+        """
+        Download a single element, splitting it into up to parts
+        byte ranges downloaded concurrently if it is larger than
+        the threshold and the server accepts ranges.
 
-        if response.status_code == 200:
-            updated_file_name = self._rename_duplicate_files(Path(url).name)
-            full_file_path = self._check_folder_path() / updated_file_name
-            with open(full_file_path, "wb") as file_object:
-                file_object.write(response.content)
-                print(f"Downloaded: {updated_file_name}")
-            self.last_request_time = time()
+        Args
+        ----
+        url: string
+            The URL of the element to be downloaded.
+        parts: integer
+            The maximum number of ranges downloaded concurrently.
+            Default is 4.
+        """
+        if parts < 1:
+            raise ValueError(f"parts must be at least 1, got {parts}")
+
+        host_semaphore = self._host_semaphore(url)
+        with _active_run(), host_semaphore:
+            self._acquire_token()
+            try:
+                self._download_element(
+                    url,
+                    _ConcurrencyLimit(parts - 1),
+                    parts
+                )
+            finally:
+                self._save_manifest()
 
     def download_multi_threaded(self, urls: list) -> None:
         """
@@ -138,34 +975,287 @@ class WebDownloader(object):
         urls: list
             A list of URLs to download elements from.
         """
-        with ThreadPoolExecutor() as executor:
-            executor.map(self.download_single_element, urls)
+        with _active_run():
+            host_urls = {}
+            for url in urls:
+                try:
+                    host_urls[urlparse(url).netloc] = url
+                except ValueError:
+                    continue
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                list(executor.map(self._warm_up_host, host_urls.values()))
+
+            url_queue = queue.Queue()
+            for url in urls:
+                url_queue.put(url)
+            url_queue.put(None)
+            self._run_workers(url_queue)
+
+    def _run_workers(self, url_queue: queue.Queue) -> None:
+        """
+        Download the URLs from the queue with the worker threads,
+        the request scheduler and the concurrency controller,
+        until the queue yields None.
+
+        Args
+        ----
+        url_queue: queue.Queue
+            The queue of URLs waiting to be downloaded.
+        """
+        ready_queue = queue.Queue()
+        concurrency_limit = _ConcurrencyLimit(
+            min(self.initial_concurrency, self.max_workers)
+        )
+        scheduler = threading.Thread(
+            target=self._schedule_requests,
+            args=(url_queue, ready_queue, concurrency_limit)
+        )
+        stop_event = threading.Event()
+
+        controller = threading.Thread(
+            target=self._adjust_concurrency,
+            args=(concurrency_limit, stop_event),
+            daemon=True
+        )
+        workers = [
+            threading.Thread(
+                target=self._download_worker,
+                args=(ready_queue, concurrency_limit)
+            )
+            for _ in range(self.max_workers)
+        ]
+        scheduler.start()
+        controller.start()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        scheduler.join()
+        stop_event.set()
+        controller.join()
+        self._save_manifest()
+
+    def _schedule_requests(self,
+                           url_queue: queue.Queue,
+                           ready_queue: queue.Queue,
+                           concurrency_limit: _ConcurrencyLimit) -> None:
+        """
+        Hand each URL to a worker together with a permit of the
+        concurrency limit and a connection to its host, taking
+        the request token only once both are held: a worker is then
+        always free to send the request right away, so paid URLs
+        never pile up in the queue or wait for their host.
+        Once the URLs run out, put one None per worker to stop them.
+
+        Args
+        ----
+        url_queue: queue.Queue
+            The queue of URLs waiting to be scheduled.
+        ready_queue: queue.Queue
+            The queue of URLs, with the semaphores of their hosts,
+            the workers download from.
+        concurrency_limit: _ConcurrencyLimit
+            The limit whose permits bound the concurrent downloads.
+        """
+        while True:
+            url = url_queue.get()
+            if url is None:
+                break
+            try:
+                host_semaphore = self._host_semaphore(url)
+            except ValueError as error:
+                logger.warning("Failed: %s (%s)", url, error)
+                continue
+            concurrency_limit.acquire()
+            host_semaphore.acquire()
+            self._acquire_token()
+            ready_queue.put((url, host_semaphore))
+        for _ in range(self.max_workers):
+            ready_queue.put(None)
+
+    def _download_worker(self,
+                         url_queue: queue.Queue,
+                         concurrency_limit: _ConcurrencyLimit) -> None:
+        """
+        Download elements from the queue until it yields None,
+        releasing the permit and the connection the scheduler took
+        for each of them once it is downloaded.
+
+        Args
+        ----
+        url_queue: queue.Queue
+            The queue of URLs, with the semaphores of their hosts,
+            waiting to be downloaded.
+        concurrency_limit: _ConcurrencyLimit
+            The limit whose permits bound the concurrent downloads.
+        """
+        while True:
+            item = url_queue.get()
+            if item is None:
+                return
+            url, host_semaphore = item
+            try:
+                self._download_element(
+                    url,
+                    concurrency_limit,
+                    self._element_parts()
+                )
+            except (requests.RequestException,
+                    Urllib3HTTPError,
+                    OSError,
+                    ValueError) as error:
+                logger.warning("Failed: %s (%s)", url, error)
+            finally:
+                host_semaphore.release()
+                concurrency_limit.release()
+
+    def _adjust_concurrency(self,
+                            concurrency_limit: _ConcurrencyLimit,
+                            stop_event: threading.Event) -> None:
+        """
+        Sample the download throughput periodically and add a permit
+        when it improved by more than 5%, or remove one when it dropped.
+
+        Args
+        ----
+        concurrency_limit: _ConcurrencyLimit
+            The limit whose permits bound the concurrent downloads.
+        stop_event: threading.Event
+            The event set once all downloads are finished.
+        """
+        interval = self.concurrency_sample_interval
+        permits = min(self.initial_concurrency, self.max_workers)
+        last_bytes = self._downloaded_bytes
+        last_throughput = 0.0
+
+        while not stop_event.wait(interval):
+            current_bytes = self._downloaded_bytes
+            throughput = (current_bytes - last_bytes) / interval
+            last_bytes = current_bytes
+
+            if (throughput > last_throughput * 1.05
+                    and permits < self.max_workers):
+                concurrency_limit.add_permit()
+                permits += 1
+            elif throughput < last_throughput and permits > 1:
+                concurrency_limit.remove_permit()
+                permits -= 1
+            last_throughput = throughput
 
     def download_all_elements(self) -> None:
         """
         Download all elements from the specified website.
         """
-        response = WebDownloader._make_request(self.website_url)
+        with _active_run():
+            with self._make_request(self.website_url) as response:
+                if response.status_code != 200:
+                    return
 
-        if response.status_code == 200:
-            print(
-                f"Downloading {self.element_tag}s "
-                f"from: {self.website_url}"
-            )
-            soup = BeautifulSoup(response.text, "html.parser")
-            element_tags = soup.find_all(
-                name="img" if self.element_tag == "image" else self.element_tag,
-                src=True
+                logger.info(
+                    "Downloading %ss from: %s",
+                    self.element_tag,
+                    self.website_url
+                )
+                url_queue = queue.Queue()
+                producer_errors = []
+                producer = threading.Thread(
+                    target=self._produce_element_urls,
+                    args=(response, url_queue, producer_errors)
+                )
+                producer.start()
+                self._run_workers(url_queue)
+                producer.join()
+                if producer_errors:
+                    raise producer_errors[0]
+            logger.info("All downloads completed.")
+
+    async def _download_async(self,
+                              client: "httpx.AsyncClient",
+                              semaphore: asyncio.Semaphore,
+                              url: str) -> None:
+        """
+        Download a single element asynchronously.
+
+        Args
+        ----
+        client: httpx.AsyncClient
+            The client shared by all downloads.
+        semaphore: asyncio.Semaphore
+            The semaphore limiting the number of concurrent downloads.
+        url: string
+            The URL of the element to be downloaded.
+        """
+        file_name = self._element_file_name(url)
+        async with semaphore:
+            wait_time = self._reserve_token()
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+            try:
+                async with client.stream(
+                    "GET",
+                    url,
+                    headers=self._conditional_headers(url)
+                ) as response:
+                    if response.status_code == 304:
+                        logger.info("Not modified: %s", file_name)
+                    elif response.status_code == 200:
+                        with self._open_element_file(
+                            url,
+                            response.headers
+                        ) as file_object:
+                            preallocated = self._preallocate(
+                                file_object,
+                                response.headers
+                            )
+                            async for chunk in response.aiter_bytes(65536):
+                                file_object.write(chunk)
+                            if preallocated:
+                                file_object.truncate()
+            except (httpx.HTTPError, OSError) as error:
+                logger.warning("Failed: %s (%s)", url, error)
+
+    async def download_all_elements_async(self) -> None:
+        """
+        Download all elements from the specified website
+        over a single HTTP/2 connection per host.
+        """
+        if httpx is None:
+            raise ImportError(
+                "httpx is required for HTTP/2 downloads, "
+                "install it with: pip install httpx[http2]"
             )
-            elem_urls = [
-                urljoin(
-                    self.website_url,
-                    elem_tag.get("src")
+
+        with _active_run():
+            async with httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(
+                    max_connections=100,
+                    max_keepalive_connections=20
+                ),
+                headers=self.headers,
+                timeout=10,
+                follow_redirects=True
+            ) as client:
+                response = await client.get(self.website_url)
+                if response.status_code != 200:
+                    return
+
+                logger.info(
+                    "Downloading %ss from: %s",
+                    self.element_tag,
+                    self.website_url
                 )
-                for elem_tag in element_tags
-            ]
-            self.download_multi_threaded(elem_urls)
-            print("All downloads completed.")
+                elem_urls = self._extract_element_urls(response.content)
+
+                semaphore = asyncio.Semaphore(self.max_workers)
+                try:
+                    await asyncio.gather(*[
+                        self._download_async(client, semaphore, url)
+                        for url in elem_urls
+                    ])
+                finally:
+                    self._save_manifest()
+                logger.info("All downloads completed.")
 
 
 def main() -> None:
@@ -196,14 +1286,13 @@ def main() -> None:
         )
     )
 
-    downloader = WebDownloader(
+    with WebDownloader(
         website_url=website_url_input,
         folder_path=folder_path_input,
         element_tag=element_tag_input,
         requests_per_minute=requests_per_minute_input
-    )
-
-    downloader.download_all_elements()
+    ) as downloader:
+        downloader.download_all_elements()
 
     if platform.system() == "Windows":
         os.system("pause")